@@ -6,16 +6,15 @@ import ast
 import json
 import re
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-import nbformat
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 
 LAB_SUMMARY_VAR = "LAB_SUMMARY"
 
 
-@dataclass
+@dataclass(slots=True)
 class GradeResult:
     student: str
     path: str
@@ -32,8 +31,175 @@ class GradeResult:
             self.warnings = []
 
 
-def read_notebook(nb_path: Path) -> nbformat.NotebookNode:
-    return nbformat.read(str(nb_path), as_version=4)
+def read_notebook(nb_path: Path) -> Dict[str, Any]:
+    # JSON plano: solo usamos cell_type y source, no hace falta la validación de nbformat.
+    # Se parsean los bytes directo: json detecta la codificación (y un BOM, si el editor lo dejó).
+    data = nb_path.read_bytes()
+    try:
+        nb = json.loads(data)
+    except ValueError as e:
+        snippet = data[:40].decode("utf-8", "replace")
+        raise ValueError(f"El notebook no parece ser JSON: {snippet!r}") from e
+    if not isinstance(nb, dict):
+        raise ValueError("El notebook no parece ser JSON: se esperaba un objeto en la raíz.")
+    # nbformat < 4 guarda las celdas en worksheets[].cells[].input; no lo convertimos.
+    nbf = nb.get("nbformat", 0)
+    if not isinstance(nbf, int) or nbf < 4:
+        raise ValueError(
+            f"Formato de notebook no soportado (nbformat={nbf}). Volvé a guardarlo con Jupyter (nbformat 4)."
+        )
+    # Descartamos outputs (imágenes base64, stdout largo) y metadata: solo nos quedamos
+    # con lo que leen los validadores, así no viven en memoria durante la corrección.
+    nb["cells"] = [
+        {"cell_type": c.get("cell_type"), "source": _cell_source(c)}
+        for c in nb.get("cells", [])
+    ]
+    return nb
+
+
+def _cell_source(cell: Dict[str, Any]) -> str:
+    # En el .ipynb el source puede ser un string o una lista de líneas
+    # (read_notebook ya lo deja como string: ahí es solo un isinstance).
+    src = cell.get("source", "")
+    return src if isinstance(src, str) else "".join(src)
+
+
+@lru_cache(maxsize=64)
+def _title_pattern(title_regex: str) -> re.Pattern:
+    # Un patrón por spec de lab; se compila una vez por corrida, no por notebook.
+    return re.compile(title_regex, re.IGNORECASE)
+
+
+def _is_ident_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _skip_string(code: str, i: int) -> int:
+    """
+    Devuelve el índice justo después del string que abre en code[i] (comilla simple o triple).
+    Un string de una línea sin cerrar termina en el salto de línea; uno triple, al final de la celda.
+    """
+    n = len(code)
+    q = code[i]
+    if code.startswith(q * 3, i):
+        close = q * 3
+        j = i + 3
+        while j < n:
+            if code[j] == "\\":
+                j += 2
+            elif code.startswith(close, j):
+                return j + 3
+            else:
+                j += 1
+        return n
+    j = i + 1
+    while j < n:
+        ch = code[j]
+        if ch == "\\":
+            j += 2
+        elif ch == q:
+            return j + 1
+        elif ch == "\n":
+            return j
+        else:
+            j += 1
+    return n
+
+
+def _match_brace(code: str, start: int) -> int:
+    """
+    Devuelve el índice justo después de la '}' que cierra la '{' en code[start], o -1 si no cierra.
+    Las llaves dentro de strings y comentarios no cuentan.
+    """
+    n = len(code)
+    depth = 0
+    i = start
+    while i < n:
+        ch = code[i]
+        if ch in "'\"":
+            i = _skip_string(code, i)
+            continue
+        if ch == "#":
+            i = code.find("\n", i)
+            if i < 0:
+                return -1
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def _find_summary_literal(code: str, varname: str) -> Optional[Tuple[int, int]]:
+    """
+    Devuelve (inicio, fin) del dict de la última asignación `VAR = {...}` de la celda, o None.
+    fin es -1 si la llave no cierra. Recorre la celda salteando strings, comentarios y líneas
+    de magics (%, !), así que `print(f"VAR = {VAR}")` o `# VAR = {...}` no cuentan.
+    """
+    n = len(code)
+    found = None
+    depth = 0
+    line_start = True
+    i = 0
+    while i < n:
+        ch = code[i]
+        if ch == "\n":
+            line_start = True
+            i += 1
+            continue
+        if ch in " \t":
+            i += 1
+            continue
+        if ch == "#" or (line_start and ch in "%!"):
+            i = code.find("\n", i)
+            if i < 0:
+                break
+            continue
+        line_start = False
+        if ch in "'\"":
+            i = _skip_string(code, i)
+            continue
+        if _is_ident_char(ch):
+            j = i + 1
+            while j < n and _is_ident_char(code[j]):
+                j += 1
+            if depth == 0 and code[i:j] == varname:
+                k = j
+                while k < n and code[k].isspace():
+                    k += 1
+                # '=' simple (no '==')
+                if k < n and code[k] == "=" and code[k + 1:k + 2] != "=":
+                    k += 1
+                    while k < n and code[k].isspace():
+                        k += 1
+                    if k < n and code[k] == "{":
+                        end = _match_brace(code, k)
+                        found = (k, end)
+                        if end < 0:
+                            break
+                        # Como al ejecutar: una asignación posterior pisa a la anterior.
+                        i = end
+                        continue
+            i = j
+            continue
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth = max(depth - 1, 0)
+        i += 1
+    return found
+
+
+_JSON_ONLY_WORDS = re.compile(r"\b(?:true|false|null)\b")
+
+
+def _reject_json_constant(name: str):
+    # NaN / Infinity / -Infinity: json los acepta, literal_eval no
+    raise ValueError(f"Constante no válida en Python: {name}")
 
 
 def _extract_dict_literal_from_code(code: str, varname: str) -> Optional[Dict[str, Any]]:
@@ -41,43 +207,38 @@ def _extract_dict_literal_from_code(code: str, varname: str) -> Optional[Dict[st
     Busca: VAR = { ... } y parsea el dict con ast.literal_eval (sin ejecutar el notebook).
     Recomendación: que el estudiante deje LAB_SUMMARY como dict literal (no construido por código complejo).
     """
-    # Captura greedy del dict. Funciona bien si el dict es literal estándar.
-    pattern = re.compile(rf"{re.escape(varname)}\s*=\s*({{.*}})\s*$", re.DOTALL | re.MULTILINE)
-    m = pattern.search(code)
-    if not m:
+    # Sin regex: un solo recorrido lineal de la celda ubica `VAR = {` y su llave de cierre.
+    loc = _find_summary_literal(code, varname)
+    if loc is None:
         return None
-    raw = m.group(1)
+    start, end = loc
+    if end < 0:
+        return {"__parse_error__": True}
+    raw = code[start:end]
+    # Camino rápido: la mayoría de los dicts con comillas dobles son JSON válido (parser en C).
+    # Solo se usa si el resultado coincide con el de literal_eval: sin true/false/null ni
+    # NaN/Infinity (no son literales de Python) y sin escapes (\/ y pares surrogate difieren).
+    if "\\" not in raw and not _JSON_ONLY_WORDS.search(raw):
+        try:
+            return json.loads(raw, parse_constant=_reject_json_constant)
+        except ValueError:
+            pass
     try:
         return ast.literal_eval(raw)
     except Exception:
-        # Intento alternativo: si hay trailing spaces/prints, buscar primera llave balanceada
-        try:
-            start = raw.find("{")
-            if start < 0:
-                return None
-            # Búsqueda balanceada simple
-            depth = 0
-            end = None
-            for i, ch in enumerate(raw[start:], start=start):
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        end = i + 1
-                        break
-            if end is None:
-                return None
-            return ast.literal_eval(raw[start:end])
-        except Exception:
-            return {"__parse_error__": True}
-
-
-def extract_lab_summary(nb: nbformat.NotebookNode, varname: str = LAB_SUMMARY_VAR) -> Optional[Dict[str, Any]]:
-    for cell in nb.cells:
+        return {"__parse_error__": True}
+
+
+def extract_lab_summary(nb: Dict[str, Any], varname: str = LAB_SUMMARY_VAR) -> Optional[Dict[str, Any]]:
+    # LAB_SUMMARY suele estar al final del notebook: recorremos de atrás hacia adelante.
+    cells = nb.get("cells", [])
+    for cell in reversed(cells):
         if cell.get("cell_type") != "code":
             continue
-        code = cell.get("source", "")
+        code = _cell_source(cell)
+        # Filtro barato antes de parsear: la mayoría de las celdas no mencionan la variable.
+        if varname not in code:
+            continue
         d = _extract_dict_literal_from_code(code, varname=varname)
         if d is not None:
             return d
@@ -89,20 +250,28 @@ def get_student_from_path(nb_path: Path) -> str:
     return nb_path.parent.name
 
 
-def find_markdown_section_text(nb: nbformat.NotebookNode, title_regex: str) -> str:
+def iter_markdown_section_texts(nb: Dict[str, Any], title_regex: str) -> Iterator[str]:
     """
-    Devuelve el texto (concatenado) de celdas Markdown que contengan un título que matchee title_regex.
-    Útil para exigir que el mini-reporte exista.
+    Genera, una a una, las celdas Markdown que contengan un título que matchee title_regex.
+    Permite cortar apenas se junta lo necesario sin recorrer el resto del notebook.
     """
-    rx = re.compile(title_regex, re.IGNORECASE)
-    texts = []
-    for cell in nb.cells:
+    rx = _title_pattern(title_regex)
+    search = rx.search
+    cells = nb.get("cells", [])
+    for cell in cells:
         if cell.get("cell_type") != "markdown":
             continue
-        src = cell.get("source", "")
-        if rx.search(src):
-            texts.append(src)
-    return "\n\n".join(texts).strip()
+        src = _cell_source(cell)
+        if search(src):
+            yield src
+
+
+def find_markdown_section_text(nb: Dict[str, Any], title_regex: str) -> str:
+    """
+    Devuelve el texto (concatenado) de celdas Markdown que contengan un título que matchee title_regex.
+    Útil para exigir que el mini-reporte exista.
+    """
+    return "\n\n".join(iter_markdown_section_texts(nb, title_regex)).strip()
 
 
 # ----------------------------
@@ -110,15 +279,18 @@ def find_markdown_section_text(nb: nbformat.NotebookNode, title_regex: str) -> s
 # ----------------------------
 
 def is_number(x: Any) -> bool:
-    return isinstance(x, (int, float)) and not isinstance(x, bool)
+    # Tipo exacto: LAB_SUMMARY sale de json/literal_eval, así que solo hay int/float nativos
+    # (y bool queda afuera sin un segundo isinstance).
+    t = type(x)
+    return t is int or t is float
 
 
 def require_keys(d: Dict[str, Any], keys: List[str]) -> List[str]:
-    errs = []
-    for k in keys:
-        if k not in d:
-            errs.append(f"Falta clave obligatoria: '{k}'")
-    return errs
+    missing = set(keys) - d.keys()
+    if not missing:
+        return []
+    # Mantiene el orden del spec para que los mensajes sean estables entre corridas.
+    return [f"Falta clave obligatoria: '{k}'" for k in keys if k in missing]
 
 
 def require_type(d: Dict[str, Any], key: str, typ, msg: str) -> Optional[str]:
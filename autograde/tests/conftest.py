@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# grade.py importa `common` como script (desde autograde/); los tests usan el mismo sys.path.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,71 @@
+from common import _extract_dict_literal_from_code, extract_lab_summary
+
+VAR = "LAB_SUMMARY"
+FULL = 'LAB_SUMMARY = {"student": "caro", "pvalue": 0.03}\n'
+
+
+def _nb(*sources):
+    return {"cells": [{"cell_type": "code", "source": s} for s in sources]}
+
+
+def test_ignora_asignacion_dentro_de_fstring():
+    nb = _nb(FULL, 'print(f"LAB_SUMMARY = {LAB_SUMMARY}")\n')
+    assert extract_lab_summary(nb) == {"student": "caro", "pvalue": 0.03}
+
+
+def test_ignora_asignacion_comentada_en_la_misma_celda():
+    code = FULL + '# LAB_SUMMARY = {"student": "caro"}  # versión vieja\n'
+    assert _extract_dict_literal_from_code(code, VAR) == {"student": "caro", "pvalue": 0.03}
+
+
+def test_ignora_asignacion_comentada_en_celda_posterior():
+    nb = _nb(FULL, '# LAB_SUMMARY = {"student": "caro"}\nprint(1)\n')
+    assert extract_lab_summary(nb) == {"student": "caro", "pvalue": 0.03}
+
+
+def test_ultima_asignacion_gana():
+    code = 'LAB_SUMMARY = {"a": 1}\nLAB_SUMMARY = {"a": 2}\n'
+    assert _extract_dict_literal_from_code(code, VAR) == {"a": 2}
+
+
+def test_comentarios_dentro_del_dict():
+    code = 'LAB_SUMMARY = {\n    "pvalue": 0.03,  # el test de Welch\'s\n    "a": 1,  # a } here\n}\n'
+    assert _extract_dict_literal_from_code(code, VAR) == {"pvalue": 0.03, "a": 1}
+
+
+def test_string_triple_con_comilla_impar():
+    code = "LAB_SUMMARY = {'a': '''x ' y'''}\n"
+    assert _extract_dict_literal_from_code(code, VAR) == {"a": "x ' y"}
+
+
+def test_linea_magic_con_comilla():
+    code = "%matplotlib inline\n!echo it's ok\n" + FULL
+    assert _extract_dict_literal_from_code(code, VAR) == {"student": "caro", "pvalue": 0.03}
+
+
+def test_llave_sin_cerrar_es_error_de_parseo():
+    assert _extract_dict_literal_from_code("LAB_SUMMARY = {'a': 1\n", VAR) == {"__parse_error__": True}
+
+
+def test_sin_asignacion():
+    assert _extract_dict_literal_from_code("print(LAB_SUMMARY)\nLAB_SUMMARY == {}\n", VAR) is None
+
+
+def test_json_rapido_no_acepta_tokens_que_no_son_python():
+    for code in (
+        'LAB_SUMMARY = {"effect": {"value": NaN}, "ci": [NaN, Infinity]}',
+        'LAB_SUMMARY = {"ok": true, "n": null}',
+    ):
+        assert _extract_dict_literal_from_code(code, VAR) == {"__parse_error__": True}
+
+
+def test_json_rapido_mismo_resultado_que_literal_eval():
+    # json une el par surrogate en un solo carácter; Python deja los dos escapes tal cual.
+    code = 'LAB_SUMMARY = {"a": [1, 2.5], "s": "\\ud83d\\ude00", "t": "true story"}'
+    assert _extract_dict_literal_from_code(code, VAR) == {"a": [1, 2.5], "s": "\ud83d\ude00", "t": "true story"}
+
+
+def test_acepta_ipynb_crudo():
+    # Sin pasar por read_notebook: source como lista de líneas y celdas sin source.
+    nb = {"cells": [{"cell_type": "raw"}, {"cell_type": "code", "source": FULL.splitlines(True)}]}
+    assert extract_lab_summary(nb) == {"student": "caro", "pvalue": 0.03}